@@ -29,10 +29,8 @@ class SqlTableView(QTableView):
     def do_copy_data(self):
         selected_ranges = self.selectedIndexes()
         indexes_dict = {}
-        proxy_model = self.model()
         for index in selected_ranges:  # 遍历每个单元格
-            real_index = proxy_model.mapToSource(index)
-            row, column = real_index.row(), real_index.column()  # 获取单元格的行号，列号
+            row, column = index.row(), index.column()  # 获取单元格的行号，列号
             if row in indexes_dict.keys():
                 indexes_dict[row].append(column)
             else:
@@ -44,14 +42,14 @@ class SqlTableView(QTableView):
             row_data = []
             head_columns = columns
             for column in columns:
-                data = self.model().sourceModel().item_data(row, column)
+                data = self.model().item_data(row, column)
                 row_data.append(data)
 
             text.append('\t'.join(row_data))
 
         # heads = []
         # for column in head_columns:
-        #     data = self.model().sourceModel().item_head(column)
+        #     data = self.model().item_head(column)
         #     heads.append(data)
         #
         # return '\t'.join(heads) + '\n' + '\n'.join(text)
@@ -121,6 +121,7 @@ class DBCat(QtWidgets.QMainWindow):
         """执行SQL语句查询"""
         sql_statement, high_risk_operator = self.sqlTabEdit.selections()
         self.sqlHostTreeWidget.exec_sql(sql_statement, high_risk_operator)
+        self.sqlTabEdit.request_save()
 
     def retranslateUi(self, DBcat):
         _translate = QtCore.QCoreApplication.translate
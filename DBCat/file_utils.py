@@ -5,7 +5,9 @@
 """
 
 import os
+import codecs
 import logging
+import functools
 from pathlib import Path
 from typing import Optional, List, Dict, Any
 from PyQt5.QtWidgets import QWidget
@@ -16,6 +18,14 @@ from DBCat.error_handler import FileErrorHandler, show_warning_message
 logger = logging.getLogger(__name__)
 
 
+# 文件读写缓冲区大小，默认的8KB对较大的SQL文件偏小
+IO_BUFFER_SIZE = 128 * 1024
+
+
+# GBK/GB2312按超集GB18030解码，可以正确读取只在GB18030中定义的字符
+_DECODE_AS = {'gbk': 'gb18030', 'gb2312': 'gb18030'}
+
+
 class FileEncodingError(Exception):
     """文件编码错误异常"""
     pass
@@ -74,18 +84,24 @@ class SafeFileReader:
             if not os.access(file_path, os.R_OK):
                 raise PermissionError(f"没有权限读取文件: {file_path}")
             
-            # 尝试不同编码读取文件
+            # 只读取一次文件，之后在内存中尝试不同编码解码
+            with open(file_path, 'rb', buffering=IO_BUFFER_SIZE) as file_handler:
+                raw = file_handler.read()
+            
+            # 带BOM时优先尝试utf-8-sig，解码失败再按编码列表依次尝试
+            if raw.startswith(codecs.BOM_UTF8):
+                encoding_list = ['utf-8-sig'] + [encoding for encoding in encoding_list if encoding != 'utf-8-sig']
+            
             for encoding in encoding_list:
                 try:
-                    with open(file_path, 'r', encoding=encoding) as file_handler:
-                        content = file_handler.read()
-                        
-                        # 如果成功读取且不是首选编码，记录信息
-                        if encoding != encoding_list[0]:
-                            logger.info(f"文件 {file_path} 使用 {encoding} 编码读取成功")
-                        
-                        return content
-                        
+                    content = raw.decode(_DECODE_AS.get(encoding, encoding))
+                    
+                    # 如果成功读取且不是首选编码，记录信息
+                    if encoding != encoding_list[0]:
+                        logger.info(f"文件 {file_path} 使用 {encoding} 编码读取成功")
+                    
+                    return self._normalize_newlines(content)
+                    
                 except UnicodeDecodeError as e:
                     attempted_encodings.append(encoding)
                     logger.debug(f"编码 {encoding} 读取文件 {file_path} 失败: {e}")
@@ -104,6 +120,13 @@ class SafeFileReader:
                 logger.error(f"读取文件 {file_path} 失败: {e}")
             return None
     
+    @staticmethod
+    def _normalize_newlines(content: str) -> str:
+        """与文本模式读取保持一致，将\r\n和\r统一转换为\n"""
+        if '\r' not in content:
+            return content
+        return content.replace('\r\n', '\n').replace('\r', '\n')
+    
     def detect_encoding(self, file_path: Path) -> Optional[str]:
         """
         检测文件编码
@@ -116,6 +139,14 @@ class SafeFileReader:
         """
         if not isinstance(file_path, Path):
             file_path = Path(file_path)
+        
+        try:
+            with open(file_path, 'rb') as file_handler:
+                if file_handler.read(len(codecs.BOM_UTF8)) == codecs.BOM_UTF8:
+                    return 'utf-8-sig'
+        except Exception as e:
+            logger.error(f"检测文件 {file_path} 编码时发生错误: {e}")
+            return None
             
         for encoding in self.encodings:
             try:
@@ -160,7 +191,7 @@ class SafeFileWriter:
                 logger.info(f"创建目录: {file_path.parent}")
             
             # 写入文件
-            with open(file_path, 'w', encoding=encoding) as file_handler:
+            with open(file_path, 'w', encoding=encoding, buffering=IO_BUFFER_SIZE) as file_handler:
                 file_handler.write(content)
                 
             logger.info(f"文件写入成功: {file_path}")
@@ -181,7 +212,8 @@ class SafeFileWriter:
 
 # 便捷函数
 def safe_read_file(file_path, encodings: Optional[List[str]] = None, 
-                parent: Optional[QWidget] = None, show_dialog: bool = False) -> Optional[str]:
+                parent: Optional[QWidget] = None, show_dialog: bool = False,
+                encoding_hint: Optional[str] = None) -> Optional[str]:
     """
     便捷的安全文件读取函数
     
@@ -190,10 +222,14 @@ def safe_read_file(file_path, encodings: Optional[List[str]] = None,
         encodings: 可选的编码列表
         parent: 父窗口，用于显示错误对话框
         show_dialog: 是否显示用户友好的错误对话框
+        encoding_hint: 调用方已知的文件编码，优先尝试，解码失败时再按编码列表依次尝试
         
     Returns:
         文件内容字符串，如果读取失败则返回None
     """
+    if encoding_hint:
+        encodings = [encoding_hint] + [encoding for encoding in encodings or SafeFileReader.DEFAULT_ENCODINGS
+                                       if encoding != encoding_hint]
     reader = SafeFileReader(encodings)
     try:
         return reader.read_file(Path(file_path), encodings, parent, show_dialog)
@@ -220,7 +256,7 @@ def safe_write_file(file_path, content: str, encoding: str = 'utf-8') -> bool:
 
 def detect_file_encoding(file_path) -> Optional[str]:
     """
-    便捷的文件编码检测函数
+    便捷的文件编码检测函数，文件未变化时直接返回缓存的检测结果
     
     Args:
         file_path: 文件路径
@@ -228,5 +264,17 @@ def detect_file_encoding(file_path) -> Optional[str]:
     Returns:
         检测到的编码名称，如果检测失败则返回None
     """
+    file_path = Path(file_path)
+    try:
+        stat = file_path.stat()
+    except OSError as e:
+        logger.error(f"检测文件 {file_path} 编码时发生错误: {e}")
+        return None
+    return _detect_encoding_cached(str(file_path.absolute()), stat.st_mtime_ns, stat.st_size)
+
+
+@functools.lru_cache(maxsize=256)
+def _detect_encoding_cached(path: str, mtime_ns: int, size: int) -> Optional[str]:
+    """按(路径, 修改时间, 文件大小)缓存编码检测结果，文件变化后缓存自动失效"""
     reader = SafeFileReader()
-    return reader.detect_encoding(Path(file_path))
\ No newline at end of file
+    return reader.detect_encoding(Path(path))
\ No newline at end of file
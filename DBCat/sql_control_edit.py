@@ -1,15 +1,63 @@
 # -*- coding: utf-8 -*-
+import math
 from datetime import datetime
+from decimal import Decimal, InvalidOperation
 from PyQt5.QtGui import QFont, QIcon
 from PyQt5.QtWidgets import QTabWidget, QTabBar, QTableView, QApplication, QAbstractItemView
-from PyQt5.QtCore import Qt, QModelIndex, QAbstractTableModel, QVariant, QSortFilterProxyModel
+from PyQt5.QtCore import Qt, QModelIndex, QAbstractTableModel, QVariant
 
 from DBCat.dboperator import mysql_operator
 from DBCat import resource as res
 from DBCat.component import sqlTableView
 
 
+# 图标在首次使用时加载，所有实例共享
+_icons = {}
+
+
+def _icon(name):
+    icon = _icons.get(name)
+    if icon is None:
+        icon = QIcon(res.resource_path('image/{}.svg'.format(name)))
+        _icons[name] = icon
+    return icon
+
+
+def _number_key(value):
+    """
+    返回值的数值排序键，不能作为数值比较时抛出ValueError
+
+    整数和Decimal直接比较，不转成float，避免超过2^53的BIGINT/DECIMAL丢失精度；
+    字符串按Decimal解析，NaN和无穷大不参与数值排序
+    """
+    if value is None:
+        return float('-inf')
+    if isinstance(value, (int, Decimal)):
+        if isinstance(value, Decimal) and not value.is_finite():
+            raise ValueError(value)
+        return value
+    if isinstance(value, float):
+        if math.isnan(value):
+            raise ValueError(value)
+        return value
+    if isinstance(value, (bytes, bytearray)):
+        value = bytes(value).decode('ascii', errors='replace')
+    if isinstance(value, str):
+        try:
+            number = Decimal(value)
+        except InvalidOperation:
+            raise ValueError(value)
+        if number.is_finite():
+            return number
+    raise ValueError(value)
+
+
 class SqlControlEdit:
+    # 打开表时每次加载的行数
+    PAGE_SIZE = 10000
+    # 没有主键的表无法稳定分页，只查询一次并最多显示的行数
+    NO_KEY_MAX_ROWS = 100000
+
     def __init__(self, tabWidget):
         super().__init__()
         self.sqlMessage = None
@@ -19,12 +67,12 @@ class SqlControlEdit:
         self.tabWidget.tabBar().setTabButton(0, QTabBar.RightSide, None)
         self.tabWidget.tabBar().setTabButton(1, QTabBar.RightSide, None)
         self.tabWidget.setCurrentIndex(0)
-        self.tabWidget.setTabIcon(0, QIcon(res.resource_path("image/msg.svg")))
-        self.tabWidget.setTabIcon(1, QIcon(res.resource_path("image/result.svg")))
+        self.tabWidget.setTabIcon(0, _icon("msg"))
+        self.tabWidget.setTabIcon(1, _icon("result"))
         self.tabWidget.tabCloseRequested.connect(self.tab_close)
 
-        self.icon_table = QIcon(res.resource_path("image/table.svg"))
-        self.icon_index = QIcon(res.resource_path("image/index.svg"))
+        self.icon_table = _icon("table")
+        self.icon_index = _icon("index")
 
     def init_message(self, sqlMessage):
         self.sqlMessage = sqlMessage
@@ -52,17 +100,71 @@ class SqlControlEdit:
             self.set_msg(headers)
 
     def open_table(self, id, db_name, table_name):
-        records, headers = mysql_operator.MysqlOperator().do_exec_statement(id, db_name, 'SELECT * FROM {}'.format(table_name))
+        order_by = self.__primary_key_order(id, db_name, table_name)
+        if order_by is None:
+            self.__open_table_without_key(id, db_name, table_name)
+            return
+
+        records, headers = self.__select_page(id, db_name, table_name, order_by, 0)
         if records is not None:
-            self.add_tab(table_name, records, headers, 'TABLE')
+            has_more = len(records) >= self.PAGE_SIZE
+            table_view = self.add_tab(table_name, records, headers, 'TABLE', has_more)
+            if has_more:
+                table_view.clicked.connect(
+                    lambda index: self.__load_more(table_view, index, id, db_name, table_name, order_by))
         else:
             self.set_msg(headers)
 
-    def add_tab(self, name, records, headers, type):
+    def __open_table_without_key(self, id, db_name, table_name):
+        """没有主键时 LIMIT/OFFSET 分页的行顺序不确定，改为查询一次并限制最大行数"""
+        sql = 'SELECT * FROM {} LIMIT {}'.format(table_name, self.NO_KEY_MAX_ROWS)
+        records, headers = mysql_operator.MysqlOperator().do_exec_statement(id, db_name, sql)
+        if records is None:
+            self.set_msg(headers)
+            return
+        if len(records) >= self.NO_KEY_MAX_ROWS:
+            self.set_msg('[WARN]: 表 {} 没有主键，无法分页加载，仅显示前 {} 行'.format(table_name, self.NO_KEY_MAX_ROWS))
+        self.add_tab(table_name, records, headers, 'TABLE')
+
+    @staticmethod
+    def __primary_key_order(id, db_name, table_name):
+        """查询表的主键列，返回分页使用的 ORDER BY 子句，没有主键时返回None"""
+        records, headers = mysql_operator.MysqlOperator().do_exec_statement(
+            id, db_name, "SHOW KEYS FROM {} WHERE Key_name = 'PRIMARY'".format(table_name))
+        if not records:
+            return None
+        column = headers.index('Column_name')
+        seq = headers.index('Seq_in_index')
+        columns = [row[column] for row in sorted(records, key=lambda row: row[seq])]
+        return ', '.join('`{}`'.format(name.replace('`', '``')) for name in columns)
+
+    def __select_page(self, id, db_name, table_name, order_by, offset):
+        sql = 'SELECT * FROM {} ORDER BY {} LIMIT {} OFFSET {}'.format(table_name, order_by, self.PAGE_SIZE, offset)
+        return mysql_operator.MysqlOperator().do_exec_statement(id, db_name, sql)
+
+    def __load_more(self, view, index, id, db_name, table_name, order_by):
+        """点击“加载更多”行时，按主键顺序和偏移量查询下一页并追加到模型"""
+        model = view.model()
+        if not model.is_load_more_row(index.row()):
+            return
+
+        try:
+            records, headers = self.__select_page(id, db_name, table_name, order_by, model.record_count())
+            if records is not None:
+                model.append_records(records, len(records) >= self.PAGE_SIZE)
+                header = view.horizontalHeader()
+                model.sort(header.sortIndicatorSection(), header.sortIndicatorOrder())
+            else:
+                self.set_msg(headers)
+        except Exception as e:
+            self.set_msg(f'[ERROR]: {e}')
+
+    def add_tab(self, name, records, headers, type, has_more=False):
         table_view = sqlTableView.SqlTableView()
-        self.__fill_table_widget(table_view, records, headers)
+        self.__fill_table_widget(table_view, records, headers, has_more)
         index = self.tabWidget.addTab(table_view, self.icon_index if type == 'INDEX' else self.icon_table, name)
         self.tabWidget.setCurrentIndex(index)
+        return table_view
 
     def exec_sql(self, id, db_name, sql):
         try:
@@ -77,42 +179,104 @@ class SqlControlEdit:
 
     def fill_result(self, records, headers):
         table_view = self.tabWidget.widget(1)
-        table_view.reset()
-        self.__fill_table_widget(table_view, records, headers)
+        model = table_view.model()
+        if isinstance(model, MyTableModel) and model._header == headers:
+            # 列相同则复用模型，保留列宽和排序状态
+            model.set_records(records)
+            header = table_view.horizontalHeader()
+            model.sort(header.sortIndicatorSection(), header.sortIndicatorOrder())
+        else:
+            table_view.reset()
+            self.__fill_table_widget(table_view, records, headers)
         self.tabWidget.setCurrentIndex(1)
 
-    def __fill_table_widget(self, view, records, headers):
-        # 创建模型
-        model = MyTableModel(records, headers)
-        proxy_model = QSortFilterProxyModel()
-        proxy_model.setSourceModel(model)
-        view.setModel(proxy_model)
+    def __fill_table_widget(self, view, records, headers, has_more=False):
+        # 创建模型，排序由模型自身完成
+        model = MyTableModel(records, headers, has_more)
+        view.setModel(model)
         view.setSortingEnabled(True)
         view.setSelectionMode(QAbstractItemView.ContiguousSelection)
+        if has_more and model.columnCount() > 1:
+            # “加载更多”行横跨所有列
+            view.setSpan(model.rowCount() - 1, 0, 1, model.columnCount())
 
 
 class MyTableModel(QAbstractTableModel):
-    def __init__(self, data, header):
+    LOAD_MORE_TEXT = '点击加载更多数据…'
+
+    def __init__(self, data, header, has_more=False):
         super().__init__()
         self._data = data
         self._header = header
+        # 预先生成的显示文本，避免每次绘制时转换
+        self._display = MyTableModel.__to_display(data)
+        # 视图行号 -> 数据行号的映射，None 表示未排序
+        self._row_index = None
+        # 每列的排序键缓存
+        self._sort_keys = {}
+        # 是否在末尾显示“加载更多”行
+        self._has_more = has_more
 
-    def rowCount(self, parent=QModelIndex()):
+    def set_records(self, data):
+        """替换模型数据，表头保持不变"""
+        self.beginResetModel()
+        self._data = data
+        self._display = MyTableModel.__to_display(data)
+        self._row_index = None
+        self._sort_keys = {}
+        self._has_more = False
+        self.endResetModel()
+
+    def append_records(self, data, has_more):
+        """在“加载更多”行之前追加数据"""
+        if data:
+            first = len(self._data)
+            self.beginInsertRows(QModelIndex(), first, first + len(data) - 1)
+            self._data.extend(data)
+            self._display.extend(MyTableModel.__to_display(data))
+            if self._row_index is not None:
+                self._row_index.extend(range(first, len(self._data)))
+            self._sort_keys = {}
+            self.endInsertRows()
+
+        if self._has_more and not has_more:
+            row = len(self._data)
+            self.beginRemoveRows(QModelIndex(), row, row)
+            self._has_more = False
+            self.endRemoveRows()
+
+    def record_count(self):
         return len(self._data)
 
+    def is_load_more_row(self, row):
+        return self._has_more and row == len(self._data)
+
+    @staticmethod
+    def __to_display(data):
+        # 只有NULL和空字符串/空字节串显示为空，0、False等值正常显示
+        return [['' if value is None or value == '' or value == b'' else str(value) for value in row]
+                for row in data]
+
+    def rowCount(self, parent=QModelIndex()):
+        return len(self._data) + 1 if self._has_more else len(self._data)
+
     def columnCount(self, parent=QModelIndex()):
         return len(self._header)
 
     def data(self, index, role=Qt.DisplayRole):
         if role == Qt.DisplayRole:
-            row = index.row()
-            col = index.column()
-            return '' if not self._data[row][col] else str(self._data[row][col])
+            if self.is_load_more_row(index.row()):
+                return self.LOAD_MORE_TEXT if index.column() == 0 else ''
+            return self.item_data(index.row(), index.column())
 
         return QVariant()
 
     def item_data(self, row, col):
-        return '' if not self._data[row][col] else str(self._data[row][col])
+        if row >= len(self._data):
+            return ''
+        if self._row_index is not None:
+            row = self._row_index[row]
+        return self._display[row][col]
 
     def item_head(self, col):
         return self._header[col]
@@ -122,5 +286,44 @@ class MyTableModel(QAbstractTableModel):
             if orientation == Qt.Horizontal:
                 return self._header[section]
             elif orientation == Qt.Vertical:
-                return f"{section}"
+                return '' if self.is_load_more_row(section) else f"{section}"
         return QVariant()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if column < 0 or column >= len(self._header):
+            return
+
+        self.layoutAboutToBeChanged.emit()
+        old_index = self._row_index
+        keys = self.__column_keys(column)
+        perm = sorted(range(len(self._data)), key=keys.__getitem__,
+                      reverse=order == Qt.DescendingOrder)
+
+        # 保持选中等持久化索引指向原来的数据行
+        position = [0] * len(perm)
+        for view_row, data_row in enumerate(perm):
+            position[data_row] = view_row
+        old_persistent = self.persistentIndexList()
+        new_persistent = []
+        for index in old_persistent:
+            if index.row() >= len(self._data):
+                new_persistent.append(index)
+                continue
+            data_row = index.row() if old_index is None else old_index[index.row()]
+            new_persistent.append(self.index(position[data_row], index.column()))
+
+        self._row_index = perm
+        self.changePersistentIndexList(old_persistent, new_persistent)
+        self.layoutChanged.emit()
+
+    def __column_keys(self, column):
+        """计算列的排序键：整列可转为数值时按数值排序，否则按显示文本排序"""
+        keys = self._sort_keys.get(column)
+        if keys is None:
+            values = [row[column] for row in self._data]
+            try:
+                keys = [_number_key(value) for value in values]
+            except ValueError:
+                keys = [row[column] for row in self._display]
+            self._sort_keys[column] = keys
+        return keys
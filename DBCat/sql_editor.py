@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from PyQt5 import QtCore
 
@@ -13,24 +14,28 @@ logger = logging.getLogger(__name__)
 
 
 class SqlEditor:
+    AUTO_SAVE_INTERVAL = 5 * 60 * 1000
+
     def __init__(self, sqlEditor):
         self.sqlEditor = sqlEditor
         self.sqlEditor.setTabsClosable(True)
         self.sqlEditor.tabCloseRequested.connect(self.tabClose)
+        # sql文件目录只解析一次
+        self._sql_dir = res.sql_dir()
 
         self.initSqlEdit()
-        # 每隔5分钟，自动保存一次文件
+        # 每隔5分钟，自动保存一次文件；每次保存后重新开始计时
+        self._save_pending = False
         self.timer = QtCore.QTimer()
-        self.timer.start(5 * 60 * 1000)
+        self.timer.setSingleShot(True)
         self.timer.timeout.connect(self.saveFiles)
+        self.timer.start(self.AUTO_SAVE_INTERVAL)
 
     def selections(self):
         return self.sqlEditor.currentWidget().selections()
 
     def loadFiles(self):
-        directory_path = res.sql_dir()
-        files_list = [file for file in directory_path.glob('**/*') if file.is_file()]
-        return [file for file in files_list if file.suffix == '.sql']
+        return [file for file in self._sql_dir.glob('*.sql') if file.is_file()]
 
     def initSqlEdit(self):
         files = self.loadFiles()
@@ -38,39 +43,73 @@ class SqlEditor:
             sqlCode = text_editor.TextEditor()
             self.sqlEditor.addTab(sqlCode, "新建查询")
         else:
-            for file in files:
-                sqlCode = text_editor.TextEditor()
-                content = safe_read_file(file, parent=self.sqlEditor.parent(), show_dialog=True)
+            # 在线程池中并行读取文件，编辑器控件仍在主线程中创建
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                contents = list(executor.map(SqlEditor.__read_file, files))
+
+            failed_files = []
+            for file, content in zip(files, contents):
                 if content is not None:
-                    sqlCode.setPlainText(content)
-                    self.sqlEditor.addTab(sqlCode, Path(file).stem)
+                    self.__add_file_tab(file, content)
                 else:
                     logger.warning(f"无法读取文件 {file}，跳过该文件")
+                    failed_files.append(file)
+
+            # 读取失败的文件在启动完成后重试，并弹出错误提示
+            if failed_files:
+                QtCore.QTimer.singleShot(0, lambda: self.__retry_read_files(failed_files))
+
+    @staticmethod
+    def __read_file(file):
+        return safe_read_file(file, show_dialog=False)
+
+    def __add_file_tab(self, file, content):
+        sqlCode = text_editor.TextEditor()
+        sqlCode.setPlainText(content)
+        self.sqlEditor.addTab(sqlCode, Path(file).stem)
+
+    def __retry_read_files(self, files):
+        for file in files:
+            content = safe_read_file(file, parent=self.sqlEditor.parent(), show_dialog=True)
+            if content is not None:
+                self.__add_file_tab(file, content)
 
     def saveFiles(self):
-        directory_path = res.sql_dir()
-        # 获取所有tab页
-        for i in range(self.sqlEditor.count()):
-            file_path = directory_path / (self.sqlEditor.tabText(i) + '.sql')
-            content = self.sqlEditor.widget(i).wholeText()
-            try:
-                success = safe_write_file(file_path, content, encoding='utf-8')
-                if not success:
-                    logger.error(f"保存文件失败: {file_path}")
+        try:
+            # 获取所有tab页
+            for i in range(self.sqlEditor.count()):
+                file_path = self._sql_dir / (self.sqlEditor.tabText(i) + '.sql')
+                content = self.sqlEditor.widget(i).wholeText()
+                try:
+                    success = safe_write_file(file_path, content, encoding='utf-8')
+                    if not success:
+                        logger.error(f"保存文件失败: {file_path}")
+                        FileErrorHandler.handle_file_error(
+                            Exception("保存文件失败"), 
+                            str(file_path), 
+                            parent=self.sqlEditor.parent(), 
+                            show_dialog=True
+                        )
+                except Exception as e:
+                    logger.error(f"保存文件时发生错误: {file_path} - {str(e)}")
                     FileErrorHandler.handle_file_error(
-                        Exception("保存文件失败"), 
+                        e, 
                         str(file_path), 
                         parent=self.sqlEditor.parent(), 
                         show_dialog=True
                     )
-            except Exception as e:
-                logger.error(f"保存文件时发生错误: {file_path} - {str(e)}")
-                FileErrorHandler.handle_file_error(
-                    e, 
-                    str(file_path), 
-                    parent=self.sqlEditor.parent(), 
-                    show_dialog=True
-                )
+        finally:
+            self.timer.start(self.AUTO_SAVE_INTERVAL)
+
+    def request_save(self):
+        """在事件循环空闲时保存文件，多次请求只会合并为一次保存"""
+        if not self._save_pending:
+            self._save_pending = True
+            QtCore.QTimer.singleShot(0, self._do_save)
+
+    def _do_save(self):
+        self._save_pending = False
+        self.saveFiles()
 
     def newSqlEdit(self, name):
         tab_index = self.findText(name)
@@ -80,11 +119,12 @@ class SqlEditor:
             sqlCode = text_editor.TextEditor()
             self.sqlEditor.addTab(sqlCode, name)
             self.sqlEditor.setCurrentWidget(sqlCode)
+            self.request_save()
 
     def tabClose(self, index: int):
         name = self.sqlEditor.tabText(index)
         self.sqlEditor.removeTab(index)
-        file = res.sql_dir() / (name + '.sql')
+        file = self._sql_dir / (name + '.sql')
         # 使用unlink()方法删除文件， unlink(missing_ok=True) 可以避免 FileNotFoundError 异常
         try:
             file.unlink(missing_ok=True)
@@ -96,6 +136,7 @@ class SqlEditor:
                 parent=self.sqlEditor.parent(), 
                 show_dialog=True
             )
+        self.request_save()
 
     def findText(self, tab_name):
         """根据tab名称查找并返回其索引，如果未找到则返回-1"""
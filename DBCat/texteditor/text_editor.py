@@ -2,11 +2,13 @@
 https://doc.qt.io/qt-5/qtwidgets-widgets-PlainTextEditor-example.html#the-linenumberarea-class
 https://doc.qt.io/qtforpython/examples/example_widgets__PlainTextEditor.html
 """
-import unicodedata
 from PyQt5 import QtCore, QtGui, QtWidgets
 
 from DBCat.texteditor import sql_highlighter
 
+# selectedText() 使用段落分隔符(U+2029)/行分隔符(U+2028)代替换行符
+_PARA_TRANSLATE = str.maketrans({'\u2029': '\n', '\u2028': '\n'})
+
 
 class LineNumberArea(QtWidgets.QWidget):
     def __init__(self, editor):
@@ -22,7 +24,6 @@ class LineNumberArea(QtWidgets.QWidget):
 
 class CodeTextEdit(QtWidgets.QPlainTextEdit):
     is_first = False
-    pressed_keys = list()
 
     indented = QtCore.pyqtSignal(object)
     unindented = QtCore.pyqtSignal(object)
@@ -31,6 +32,7 @@ class CodeTextEdit(QtWidgets.QPlainTextEdit):
 
     def __init__(self):
         super(CodeTextEdit, self).__init__()
+        self._pressed = set()
 
         self.indented.connect(self.do_indent)
         self.unindented.connect(self.undo_indent)
@@ -55,13 +57,9 @@ class CodeTextEdit(QtWidgets.QPlainTextEdit):
         if not cursor.hasSelection():
             return 0, 0
 
-        start_pos = cursor.selectionStart()
-        end_pos = cursor.selectionEnd()
-
-        cursor.setPosition(start_pos)
-        start_line = cursor.blockNumber()
-        cursor.setPosition(end_pos)
-        end_line = cursor.blockNumber()
+        doc = self.document()
+        start_line = doc.findBlock(cursor.selectionStart()).blockNumber()
+        end_line = doc.findBlock(cursor.selectionEnd()).blockNumber()
 
         return start_line, end_line
 
@@ -97,7 +95,7 @@ class CodeTextEdit(QtWidgets.QPlainTextEdit):
         Extend the key press event to create key shortcuts
         """
         self.is_first = True
-        self.pressed_keys.append(event.key())
+        self._pressed.add(event.key())
         start_line, end_line = self.get_selection_range()
 
         # indent event
@@ -120,20 +118,20 @@ class CodeTextEdit(QtWidgets.QPlainTextEdit):
         Extend the key release event to catch key combos
         """
         if self.is_first:
-            self.process_multi_keys(self.pressed_keys)
+            self.process_multi_keys(self._pressed)
 
         self.is_first = False
-        self.pressed_keys.pop()
+        self._pressed.discard(event.key())
         super(CodeTextEdit, self).keyReleaseEvent(event)
 
     def process_multi_keys(self, keys):
         """
         Placeholder for processing multiple key combo events
 
-        :param keys: [QtCore.Qt.Key]. key combos
+        :param keys: {QtCore.Qt.Key}. currently pressed keys
         """
         # toggle comments indent event
-        if keys == [QtCore.Qt.Key_Control, QtCore.Qt.Key_Slash]:
+        if keys >= {QtCore.Qt.Key_Control, QtCore.Qt.Key_Slash}:
             pass
 
     def do_indent(self, lines):
@@ -142,8 +140,13 @@ class CodeTextEdit(QtWidgets.QPlainTextEdit):
 
         :param lines: [int]. line numbers
         """
-        for line in lines:
-            self.insert_line_start('\t', line)
+        cursor = self.textCursor()
+        cursor.beginEditBlock()
+        try:
+            for line in lines:
+                self.insert_line_start('\t', line)
+        finally:
+            cursor.endEditBlock()
 
     def undo_indent(self, lines):
         """
@@ -151,8 +154,13 @@ class CodeTextEdit(QtWidgets.QPlainTextEdit):
 
         :param lines: [int]. line numbers
         """
-        for line in lines:
-            self.remove_line_start('\t', line)
+        cursor = self.textCursor()
+        cursor.beginEditBlock()
+        try:
+            for line in lines:
+                self.remove_line_start('\t', line)
+        finally:
+            cursor.endEditBlock()
 
     def do_comment(self, lines):
         """
@@ -177,16 +185,31 @@ class TextEditor(CodeTextEdit):
     """
     text editor Impl
     """
+    # 高危操作匹配规则，\b 避免 deleted_at 之类的字段名误判
+    _HIGH_RISK_RE = QtCore.QRegularExpression(r"\b(delete|drop|alter)\b\s*",
+                                              QtCore.QRegularExpression.CaseInsensitiveOption)
+    # 所有编辑器共享的等宽字体，首次创建编辑器时初始化
+    _MONO_FONT = None
+
     def __init__(self):
         super(TextEditor, self).__init__()
         self.sqlHighlighter = sql_highlighter.SqlHighlighter(self.document())
         self.line_number_area = LineNumberArea(self)
 
-        self.font = QtGui.QFont()
-        self.font.setFamily("Courier New")
-        self.font.setStyleHint(QtGui.QFont.Monospace)
-        self.font.setPointSize(12)
+        if TextEditor._MONO_FONT is None:
+            font = QtGui.QFont()
+            font.setFamily("Courier New")
+            font.setStyleHint(QtGui.QFont.Monospace)
+            font.setPointSize(12)
+            TextEditor._MONO_FONT = font
+        self.font = TextEditor._MONO_FONT
         self.setFont(self.font)
+        # 行号区域单个数字的像素宽度，字体变化时在 changeEvent 中刷新
+        self._digit_px = self.fontMetrics().horizontalAdvance('9')
+
+        # 查找缓存：上次查找的文本及其编译后的表达式
+        self._last_search = None
+        self._search_re = None
 
         self.tab_size = 4
         self.setTabStopWidth(self.tab_size * self.fontMetrics().width(' '))
@@ -199,14 +222,13 @@ class TextEditor(CodeTextEdit):
         self.highlightCurrentLine()
 
     def line_number_area_width(self):
-        digits = 1
-        max_num = max(1, self.blockCount())
-        while max_num >= 10:
-            max_num *= 0.1
-            digits += 1
+        return 30 + self._digit_px * len(str(max(1, self.blockCount())))
 
-        space = 30 + self.fontMetrics().width('9') * digits
-        return space
+    def changeEvent(self, e):
+        if e.type() == QtCore.QEvent.FontChange:
+            self._digit_px = self.fontMetrics().horizontalAdvance('9')
+            self.update_line_number_area_width(0)
+        super(TextEditor, self).changeEvent(e)
 
     def resizeEvent(self, e):
         super(TextEditor, self).resizeEvent(e)
@@ -220,10 +242,15 @@ class TextEditor(CodeTextEdit):
             search_text, ok = QtWidgets.QInputDialog.getText(self, 'Find', 'Enter text to find:')
             if ok and search_text:
                 self.find_text(search_text)
+        super(TextEditor, self).keyReleaseEvent(event)
 
     def find_text(self, text_to_find):
-        text_cursor = self.textCursor()
-        text_cursor = self.document().find(text_to_find, text_cursor)
+        if text_to_find != self._last_search:
+            self._last_search = text_to_find
+            self._search_re = QtCore.QRegularExpression(QtCore.QRegularExpression.escape(text_to_find),
+                                                        QtCore.QRegularExpression.CaseInsensitiveOption)
+
+        text_cursor = self.document().find(self._search_re, self.textCursor().selectionEnd())
         if not text_cursor.isNull():
             self.setTextCursor(text_cursor)
         else:
@@ -245,18 +272,21 @@ class TextEditor(CodeTextEdit):
 
     def lineNumberAreaPaintEvent(self, event):
         painter = QtGui.QPainter(self.line_number_area)
+        painter.setPen(QtGui.QColor(118, 150, 185))
+        width = self.line_number_area.width() - 10
+        height = self.fontMetrics().height()
+        ev_top = event.rect().top()
+        ev_bot = event.rect().bottom()
+
         block = self.firstVisibleBlock()
         block_number = block.blockNumber()
         offset = self.contentOffset()
         top = self.blockBoundingGeometry(block).translated(offset).top()
         bottom = top + self.blockBoundingRect(block).height()
 
-        while block.isValid() and top <= event.rect().bottom():
-            if block.isVisible() and bottom >= event.rect().top():
+        while block.isValid() and top <= ev_bot:
+            if block.isVisible() and bottom >= ev_top:
                 number = str(block_number + 1)
-                painter.setPen(QtGui.QColor(118, 150, 185))
-                width = self.line_number_area.width() - 10
-                height = self.fontMetrics().height()
                 painter.drawText(0, int(top), width, height, QtCore.Qt.AlignmentFlag.AlignRight, number)
 
             block = block.next()
@@ -285,12 +315,7 @@ class TextEditor(CodeTextEdit):
         content_text = []
 
         # 段落分隔符 (Zp) 替换为换行符
-        result = ""
-        for char in selection_text:
-            if unicodedata.category(char) == 'Zp':
-                result += '\n'
-            else:
-                result += char
+        result = selection_text.translate(_PARA_TRANSLATE)
 
         for text in result.split('\n'):
             text = text.strip()
@@ -303,7 +328,5 @@ class TextEditor(CodeTextEdit):
         result_text = ' '.join(content_text)
 
         # 判断是否含有高危操作
-        high_risk_exp = QtCore.QRegularExpression("(delete|drop|alter)\\s*",
-                                                  QtCore.QRegularExpression.CaseInsensitiveOption)
-        match = high_risk_exp.match(result_text)
+        match = TextEditor._HIGH_RISK_RE.match(result_text)
         return result_text, True if match.hasMatch() else False
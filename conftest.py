@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+import gc
+import shutil
+import subprocess
+
+import pytest
+from PyQt5.QtCore import QEvent
+from PyQt5.QtWidgets import QApplication, QTabWidget
+
+import pyinstaller_utils
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    """整个测试会话共用一个QApplication，避免重复初始化Qt"""
+    app = QApplication.instance() or QApplication([])
+    yield app
+
+
+@pytest.fixture
+def tab_widget(qapp):
+    """为每个测试创建QTabWidget，测试结束后立即销毁，避免窗口树在测试间累积"""
+    widget = QTabWidget()
+    yield widget
+    widget.deleteLater()
+    QApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+    gc.collect()
+
+
+@pytest.fixture(scope="session")
+def packaged_exe():
+    """整个测试会话只打包一次，返回打包后的可执行文件路径"""
+    if shutil.which("pyinstaller") is None:
+        pytest.skip("未安装PyInstaller")
+
+    try:
+        return pyinstaller_utils.build_exe()
+    except subprocess.CalledProcessError as e:
+        pytest.fail(f"PyInstaller打包失败: {e.stderr}")
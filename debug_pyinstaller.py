@@ -4,50 +4,36 @@
 import os
 import sys
 import traceback
+import atexit
 import logging
+import logging.handlers
 from pathlib import Path
 import subprocess
-import tempfile
-import time
 import shutil
 
+import pyinstaller_utils
+
+# DBCat用户数据目录，只解析并创建一次
+DBCAT_DIR = Path.home() / ".dbcat"
+DBCAT_DIR.mkdir(exist_ok=True)
+
 # 配置日志
-log_dir = Path.home() / ".dbcat"
-log_dir.mkdir(exist_ok=True)
-log_file = log_dir / "debug_pyinstaller.log"
+log_file = DBCAT_DIR / "debug_pyinstaller.log"
+
+# 日志先缓存在内存中，积累到一定数量或出现WARNING及以上级别时再批量写入文件
+file_handler = logging.FileHandler(str(log_file), encoding='utf-8')
+file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+memory_handler = logging.handlers.MemoryHandler(1024, flushLevel=logging.WARNING, target=file_handler)
 
 logging.basicConfig(
-    filename=str(log_file),
     level=logging.DEBUG,
-    format='%(asctime)s - %(levelname)s - %(message)s'
+    handlers=[memory_handler]
 )
+atexit.register(file_handler.close)
+atexit.register(memory_handler.flush)
 
-def debug_pyinstaller_packaging():
-    """调试PyInstaller打包后的程序闪退问题"""
-    logging.info("===== 开始调试PyInstaller打包后的程序闪退问题 =====")
-    
-    try:
-        # 1. 备份原始main.py
-        logging.info("1. 备份原始main.py")
-        original_main_path = Path("main.py")
-        backup_main_path = Path("main.py.bak")
-        
-        if not original_main_path.exists():
-            logging.error("找不到main.py文件")
-            return
-        
-        shutil.copy2(original_main_path, backup_main_path)
-        logging.info(f"原始main.py已备份到: {backup_main_path}")
-        
-        # 2. 创建调试版本的main.py
-        logging.info("2. 创建调试版本的main.py")
-        
-        # 读取原始main.py
-        with open(original_main_path, "r", encoding="utf-8") as f:
-            main_content = f.read()
-        
-        # 创建调试版本的main.py
-        debug_main = """# -*- coding: utf-8 -*-
+# 调试版本的main.py，记录启动过程的详细日志并在出错时弹出错误对话框
+_DEBUG_MAIN_TEMPLATE = """# -*- coding: utf-8 -*-
 import sys
 import os
 import traceback
@@ -83,13 +69,13 @@ try:
             # 加载启动图片
             try:
                 splash_path = resource.resource_path('image/splash.png')
-                logging.info(f"启动图片路径: {splash_path}")
+                logging.info("启动图片路径: %s", splash_path)
                 pixmap = QtGui.QPixmap(splash_path)
                 splash = QtWidgets.QSplashScreen(pixmap)
                 splash.show()
                 logging.info("启动画面显示成功")
             except Exception as e:
-                logging.error(f"启动画面显示失败: {e}")
+                logging.error("启动画面显示失败: %s", e)
                 logging.error(traceback.format_exc())
                 # 继续执行，不因启动画面失败而退出
 
@@ -104,13 +90,13 @@ try:
                     splash.finish(window)
                     logging.info("启动画面关闭")
             except Exception as e:
-                logging.error(f"主窗口创建或显示失败: {e}")
+                logging.error("主窗口创建或显示失败: %s", e)
                 logging.error(traceback.format_exc())
                 raise
 
             sys.exit(app.exec_())
         except Exception as e:
-            logging.error(f"主程序执行失败: {e}")
+            logging.error("主程序执行失败: %s", e)
             logging.error(traceback.format_exc())
             
             # 显示错误对话框
@@ -125,7 +111,7 @@ try:
             sys.exit(1)
 except Exception as e:
     # 写入错误到文件
-    with open(str(Path.home() / ".dbcat" / "critical_error.log"), "w", encoding="utf-8") as f:
+    with open(str(log_dir / "critical_error.log"), "w", encoding="utf-8") as f:
         f.write(f"严重错误: {str(e)}\\n\\n{traceback.format_exc()}")
     
     # 尝试显示错误对话框
@@ -144,104 +130,117 @@ except Exception as e:
     
     sys.exit(1)
 """
+_DEBUG_MAIN_BYTES = _DEBUG_MAIN_TEMPLATE.encode('utf-8')
+
+
+def debug_pyinstaller_packaging():
+    """调试PyInstaller打包后的程序闪退问题"""
+    logging.info("===== 开始调试PyInstaller打包后的程序闪退问题 =====")
+    
+    try:
+        # 1. 备份原始main.py
+        logging.info("1. 备份原始main.py")
+        original_main_path = Path("main.py")
+        backup_main_path = Path("main.py.bak")
+        
+        if not original_main_path.exists():
+            logging.error("找不到main.py文件")
+            return
+        
+        shutil.copyfile(original_main_path, backup_main_path)
+        logging.info("原始main.py已备份到: %s", backup_main_path)
+        
+        # 2. 创建调试版本的main.py
+        logging.info("2. 创建调试版本的main.py")
         
         # 保存调试版本的main.py
-        with open(original_main_path, "w", encoding="utf-8") as f:
-            f.write(debug_main)
+        original_main_path.write_bytes(_DEBUG_MAIN_BYTES)
         
         logging.info("调试版本的main.py已创建")
         
         # 3. 使用PyInstaller打包应用
         logging.info("3. 使用PyInstaller打包应用")
         
-        # 创建临时目录用于输出
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
+        # 执行PyInstaller打包，源码未变化时复用缓存的可执行文件
+        logging.info("执行PyInstaller打包")
+        try:
+            exe_path = pyinstaller_utils.build_exe()
+            logging.info("PyInstaller打包成功")
+        except subprocess.SubprocessError as e:
+            logging.error("PyInstaller打包失败: %s", e)
+            if hasattr(e, 'stderr'):
+                logging.error("错误输出: %s", e.stderr)
+            # 恢复原始main.py
+            shutil.copyfile(backup_main_path, original_main_path)
+            logging.info("已恢复原始main.py")
+            return
+        
+        # 检查打包后的可执行文件是否存在
+        if not exe_path.exists():
+            logging.error("打包后的可执行文件不存在: %s", exe_path)
+            # 恢复原始main.py
+            shutil.copyfile(backup_main_path, original_main_path)
+            logging.info("已恢复原始main.py")
+            return
+        logging.info("打包后的可执行文件已创建: %s", exe_path)
+        
+        # 4. 运行打包后的程序
+        logging.info("4. 运行打包后的程序")
+        
+        try:
+            # 启动应用程序
+            process = pyinstaller_utils.launch(exe_path)
+            logging.info("应用程序已启动，进程ID: %s", process.pid)
             
-            # 执行PyInstaller打包
-            logging.info("执行PyInstaller打包")
-            try:
-                result = subprocess.run(
-                    ["pyinstaller", "setup.spec", "--distpath", str(temp_path)],
-                    check=True, capture_output=True, text=True
-                )
-                logging.info("PyInstaller打包成功")
-            except subprocess.SubprocessError as e:
-                logging.error(f"PyInstaller打包失败: {e}")
-                if hasattr(e, 'stderr'):
-                    logging.error(f"错误输出: {e.stderr}")
-                # 恢复原始main.py
-                shutil.copy2(backup_main_path, original_main_path)
-                logging.info("已恢复原始main.py")
-                return
+            # 等待程序启动，最多等待10秒
+            logging.info("等待程序运行...")
+            error_log = DBCAT_DIR / "dbcat_error.log"
+            if pyinstaller_utils.wait_for_startup(process, error_log, timeout=10):
+                logging.info("程序主窗口已显示")
             
-            # 检查打包后的可执行文件是否存在
-            exe_path = temp_path / "DBCat.exe"
-            if not exe_path.exists():
-                logging.error(f"打包后的可执行文件不存在: {exe_path}")
-                # 恢复原始main.py
-                shutil.copy2(backup_main_path, original_main_path)
-                logging.info("已恢复原始main.py")
-                return
-            logging.info(f"打包后的可执行文件已创建: {exe_path}")
+            # 检查程序是否仍在运行
+            if process.poll() is None:
+                logging.info("程序仍在运行，看起来没有立即闪退")
+                # 结束程序及其子进程
+                pyinstaller_utils.kill_process_tree(process)
+                logging.info("程序已终止")
+            else:
+                logging.warning("程序已退出，退出码: %s", process.returncode)
             
-            # 4. 运行打包后的程序
-            logging.info("4. 运行打包后的程序")
+            # 检查是否生成了错误日志
+            critical_log = DBCAT_DIR / "critical_error.log"
             
-            try:
-                # 启动应用程序
-                process = subprocess.Popen([str(exe_path)])
-                logging.info(f"应用程序已启动，进程ID: {process.pid}")
-                
-                # 等待程序运行一段时间
-                logging.info("等待程序运行...")
-                time.sleep(10)
-                
-                # 检查程序是否仍在运行
-                if process.poll() is None:
-                    logging.info("程序仍在运行，看起来没有立即闪退")
-                    # 终止程序
-                    process.terminate()
-                    process.wait(timeout=5)
-                    logging.info("程序已终止")
-                else:
-                    logging.warning(f"程序已退出，退出码: {process.returncode}")
-                
-                # 检查是否生成了错误日志
-                error_log = Path.home() / ".dbcat" / "dbcat_error.log"
-                critical_log = Path.home() / ".dbcat" / "critical_error.log"
-                
-                if error_log.exists():
-                    logging.info(f"发现错误日志: {error_log}")
-                    with open(error_log, 'r', encoding='utf-8', errors='replace') as f:
-                        log_content = f.read()
-                        logging.info(f"错误日志内容:\n{log_content}")
-                else:
-                    logging.info("没有发现普通错误日志")
-                
-                if critical_log.exists():
-                    logging.info(f"发现严重错误日志: {critical_log}")
-                    with open(critical_log, 'r', encoding='utf-8', errors='replace') as f:
-                        log_content = f.read()
-                        logging.info(f"严重错误日志内容:\n{log_content}")
-                else:
-                    logging.info("没有发现严重错误日志")
-                
-            except Exception as e:
-                logging.error(f"运行程序时发生错误: {e}")
-                logging.error(traceback.format_exc())
+            if error_log.exists():
+                logging.info("发现错误日志: %s", error_log)
+                log_content = error_log.read_text(encoding='utf-8', errors='replace')
+                if logging.getLogger().isEnabledFor(logging.INFO):
+                    logging.info("错误日志内容:\n%s", log_content)
+            else:
+                logging.info("没有发现普通错误日志")
             
-            # 5. 恢复原始main.py
-            shutil.copy2(backup_main_path, original_main_path)
-            logging.info("已恢复原始main.py")
-    
+            if critical_log.exists():
+                logging.info("发现严重错误日志: %s", critical_log)
+                log_content = critical_log.read_text(encoding='utf-8', errors='replace')
+                if logging.getLogger().isEnabledFor(logging.INFO):
+                    logging.info("严重错误日志内容:\n%s", log_content)
+            else:
+                logging.info("没有发现严重错误日志")
+            
+        except Exception as e:
+            logging.error("运行程序时发生错误: %s", e)
+            logging.error(traceback.format_exc())
+        
+        # 5. 恢复原始main.py
+        shutil.copyfile(backup_main_path, original_main_path)
+        logging.info("已恢复原始main.py")
+
     except Exception as e:
-        logging.error(f"调试过程中发生错误: {e}")
+        logging.error("调试过程中发生错误: %s", e)
         logging.error(traceback.format_exc())
         
         # 确保恢复原始main.py
         if 'backup_main_path' in locals() and backup_main_path.exists():
-            shutil.copy2(backup_main_path, original_main_path)
+            shutil.copyfile(backup_main_path, original_main_path)
             logging.info("已恢复原始main.py")
     
     logging.info("===== PyInstaller打包调试完成 =====")
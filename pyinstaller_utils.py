@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+PyInstaller打包辅助工具
+打包结果按 setup.spec 打包的全部文件及打包依赖版本的哈希缓存，未变化时直接复用已有的可执行文件
+"""
+
+import ctypes
+import hashlib
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import time
+from importlib import metadata
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent
+CACHE_DIR = Path.home() / ".dbcat" / "pkgcache"
+BUILD_LOG = CACHE_DIR / "pyinstaller.log"
+EXE_NAME = "DBCat.exe" if sys.platform == "win32" else "DBCat"
+# 主窗口标题，用于判断程序是否已显示窗口
+WINDOW_TITLE = "DBcat"
+# 调试版 main.py 在主窗口显示后写入的日志内容
+READY_LOG_TEXT = "主窗口显示成功"
+# setup.spec 中除源码外打包进程序的文件，与 datas、icon、version 保持一致
+BUNDLED_FILES = ("image/*.*", "logo.ico", "version.txt")
+# 版本变化会影响打包结果的依赖包
+BUILD_PACKAGES = ("pyinstaller", "PyQt5", "mysql-connector-python")
+
+
+def source_hash() -> str:
+    """计算影响打包结果的源文件哈希"""
+    digest = hashlib.blake2b()
+    sources = [PROJECT_DIR / "setup.spec", PROJECT_DIR / "main.py"]
+    sources.extend(sorted((PROJECT_DIR / "DBCat").rglob("*.py")))
+    for pattern in BUNDLED_FILES:
+        sources.extend(sorted(PROJECT_DIR.glob(pattern)))
+    for path in sources:
+        digest.update(str(path.relative_to(PROJECT_DIR)).encode('utf-8'))
+        digest.update(path.read_bytes())
+    for package in BUILD_PACKAGES:
+        try:
+            version = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            version = ""
+        digest.update(f"{package}=={version}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _prune_cache(keep: Path):
+    """删除其它源码版本的打包结果，缓存目录中只保留最新一次的可执行文件"""
+    for entry in CACHE_DIR.iterdir():
+        # build 为PyInstaller的增量工作目录，需保留
+        if entry.is_dir() and entry.name != "build" and entry != keep:
+            shutil.rmtree(entry, ignore_errors=True)
+
+
+def build_exe() -> Path:
+    """
+    打包应用，缓存命中时不再调用PyInstaller
+
+    Returns:
+        打包后的可执行文件路径
+
+    Raises:
+        subprocess.CalledProcessError: PyInstaller打包失败
+    """
+    dist_path = CACHE_DIR / source_hash()
+    exe_path = dist_path / EXE_NAME
+    if exe_path.exists():
+        return exe_path
+
+    # 使用固定的 workpath，让PyInstaller自身的增量缓存生效
+    command = ["pyinstaller", "setup.spec", "--noconfirm",
+               "--distpath", str(dist_path), "--workpath", str(CACHE_DIR / "build")]
+    # 打包输出直接写入日志文件，不在内存中缓存
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    with open(BUILD_LOG, 'wb', buffering=64 * 1024) as log:
+        process = subprocess.Popen(command, cwd=PROJECT_DIR, stdout=log, stderr=subprocess.STDOUT)
+        returncode = process.wait()
+
+    if returncode:
+        raise subprocess.CalledProcessError(returncode, command, stderr=_tail(BUILD_LOG))
+    _prune_cache(dist_path)
+    return exe_path
+
+
+def _tail(path, size: int = 4096) -> str:
+    """读取文件末尾的内容，用于打包失败时的错误提示"""
+    with open(path, 'rb') as f:
+        f.seek(max(0, path.stat().st_size - size))
+        return f.read().decode('utf-8', errors='replace')
+
+
+def wait_for_startup(process, log_file=None, timeout: float = 10.0) -> bool:
+    """
+    等待打包后的程序启动完成，代替固定时长的 sleep
+
+    Windows下找到主窗口，或日志文件中出现主窗口显示成功的记录即视为启动完成
+
+    Args:
+        process: 已启动的程序进程
+        log_file: 可选的程序日志文件路径
+        timeout: 最长等待秒数
+
+    Returns:
+        启动完成返回True，进程已退出或等待超时返回False
+    """
+    log_file = Path(log_file) if log_file is not None else None
+    start_size = _file_size(log_file)
+    last_size = start_size
+    deadline = time.monotonic() + timeout
+
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+
+        if sys.platform == "win32" and ctypes.windll.user32.FindWindowW(None, WINDOW_TITLE):
+            return True
+
+        size = _file_size(log_file)
+        if size > last_size:
+            last_size = size
+            with open(log_file, 'rb') as f:
+                f.seek(start_size)
+                if READY_LOG_TEXT in f.read().decode('utf-8', errors='replace'):
+                    return True
+
+        time.sleep(0.05)
+
+    return False
+
+
+def _file_size(path) -> int:
+    try:
+        return path.stat().st_size if path is not None else 0
+    except OSError:
+        return 0
+
+
+def launch(exe_path, env=None):
+    """
+    启动打包后的程序，非Windows平台下放入独立的进程组，便于整体结束
+    """
+    return subprocess.Popen([str(exe_path)], env=env, start_new_session=sys.platform != "win32")
+
+
+def kill_process_tree(process, timeout: float = 2.0):
+    """
+    立即结束程序及其全部子进程，不等待程序响应关闭请求
+
+    Args:
+        process: 由 launch 启动的程序进程
+        timeout: 等待进程退出的最长秒数
+    """
+    if process.poll() is not None:
+        return
+
+    if sys.platform == "win32":
+        subprocess.run(["taskkill", "/T", "/F", "/PID", str(process.pid)],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    else:
+        try:
+            os.killpg(os.getpgid(process.pid), signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    process.wait(timeout=timeout)
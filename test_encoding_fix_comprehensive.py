@@ -2,11 +2,10 @@
 # -*- coding: utf-8 -*-
 
 import sys
-import os
 import tempfile
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-sys.path.append('.')
 
 from PyQt5.QtWidgets import QApplication, QTabWidget
 from DBCat.sql_editor import SqlEditor
@@ -17,13 +16,11 @@ from DBCat import resource as res
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
-def test_encoding_fix_comprehensive():
+def test_encoding_fix_comprehensive(tab_widget):
     """全面测试编码修复的有效性"""
     print("\n===== 开始全面测试编码修复的有效性 =====\n")
     
-    # 创建测试应用
-    app = QApplication([])
-    tab_widget = QTabWidget()
+    # tab_widget由夹具创建，测试结束后销毁
     sql_editor = SqlEditor(tab_widget)
     
     # 测试内容 - 包含各种中文字符和SQL语法
@@ -90,29 +87,46 @@ VALUES ('李四', 'password123', 'lisi@example.com');
         encodings = ['utf-8', 'utf-8-sig', 'gbk', 'gb2312']
         test_files = {}
         
-        for encoding in encodings:
+        def create_test_file(encoding):
             file_path = temp_path / f"test_{encoding}.sql"
             try:
                 # 使用适合的内容 - UTF-8编码可以处理所有字符，GBK/GB2312只使用中文内容
                 content = test_content_utf8 if encoding.startswith('utf') else test_content_gbk
-                with open(file_path, 'w', encoding=encoding) as f:
-                    f.write(content)
+                file_path.write_bytes(content.encode(encoding))
+                return encoding, file_path, None
+            except Exception as e:
+                return encoding, file_path, e
+        
+        # 每个线程写入不同的文件，并行执行I/O
+        with ThreadPoolExecutor(max_workers=len(encodings)) as executor:
+            created = list(executor.map(create_test_file, encodings))
+        
+        for encoding, file_path, error in created:
+            if error is None:
                 test_files[encoding] = file_path
                 print(f"  ✓ 成功创建 {encoding} 编码的测试文件")
-            except Exception as e:
-                print(f"  ✗ 创建 {encoding} 编码的测试文件失败: {e}")
+            else:
+                print(f"  ✗ 创建 {encoding} 编码的测试文件失败: {error}")
         
         print("\n2. 测试文件编码检测")
-        for encoding, file_path in test_files.items():
-            detected = detect_file_encoding(file_path)
+        with ThreadPoolExecutor(max_workers=len(encodings)) as executor:
+            detected_list = list(executor.map(detect_file_encoding, test_files.values()))
+        
+        for file_path, detected in zip(test_files.values(), detected_list):
             if detected:
                 print(f"  ✓ {file_path.name} 检测到编码: {detected}")
             else:
                 print(f"  ✗ {file_path.name} 编码检测失败")
         
         print("\n3. 测试安全文件读取")
-        for encoding, file_path in test_files.items():
-            content = safe_read_file(file_path, parent=tab_widget, show_dialog=False)
+        # 记录读取结果，第4步复制文件时直接复用
+        with ThreadPoolExecutor(max_workers=len(encodings)) as executor:
+            # 文件编码已知，作为提示传入，避免逐个尝试编码
+            read_contents = dict(zip(test_files, executor.map(
+                lambda item: safe_read_file(item[1], parent=tab_widget, show_dialog=False, encoding_hint=item[0]),
+                test_files.items())))
+        
+        for encoding, content in read_contents.items():
             if content and "用户表" in content and "李四" in content:
                 print(f"  ✓ 成功读取 {encoding} 编码的文件")
             else:
@@ -123,13 +137,13 @@ VALUES ('李四', 'password123', 'lisi@example.com');
         sql_test_dir = temp_path / "sql_test_dir"
         sql_test_dir.mkdir(exist_ok=True)
         
-        # 复制测试文件到专用目录
+        # 复制测试文件到专用目录，内容已在第3步读入内存，直接以UTF-8编码写出
         test_sql_files = {}
         for encoding, file_path in test_files.items():
-            new_path = sql_test_dir / file_path.name
-            content = safe_read_file(file_path)
+            content = read_contents.get(encoding)
             if content:
-                safe_write_file(new_path, content)
+                new_path = sql_test_dir / file_path.name
+                new_path.write_bytes(content.encode('utf-8'))
                 test_sql_files[encoding] = new_path
         
         # 临时修改SQL目录
@@ -174,7 +188,8 @@ VALUES ('李四', 'password123', 'lisi@example.com');
             print("  ✓ 文件保存成功")
             
             # 读取保存的文件并验证内容
-            saved_content = safe_read_file(test_file)
+            saved_bytes = test_file.read_bytes()
+            saved_content = saved_bytes.decode('utf-8')
             if saved_content == test_content_utf8:
                 print("  ✓ 保存和读取的内容一致")
             else:
@@ -214,4 +229,5 @@ VALUES ('李四', 'password123', 'lisi@example.com');
     print("\n===== 编码修复全面测试完成 =====")
 
 if __name__ == "__main__":
-    test_encoding_fix_comprehensive()
\ No newline at end of file
+    app = QApplication([])
+    test_encoding_fix_comprehensive(QTabWidget())
\ No newline at end of file
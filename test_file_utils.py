@@ -1,12 +1,9 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import sys
-import os
 import tempfile
 import logging
 from pathlib import Path
-sys.path.append('.')
 
 from DBCat.file_utils import (
     SafeFileReader, SafeFileWriter, 
@@ -75,6 +72,19 @@ def test_file_utils():
         else:
             print("❌ safe_read_file函数工作异常")
         
+        # 测试编码提示
+        content_hint = safe_read_file(gbk_file, encoding_hint='gbk')
+        if content_hint and content_hint == content_gbk:
+            print("✅ 按编码提示读取GBK文件成功")
+        else:
+            print("❌ 按编码提示读取GBK文件失败")
+        
+        content_wrong_hint = safe_read_file(gbk_file, encoding_hint='utf-8')
+        if content_wrong_hint and "产品" in content_wrong_hint:
+            print("✅ 编码提示错误时回退到编码列表成功")
+        else:
+            print("❌ 编码提示错误时回退到编码列表失败")
+        
         # 测试错误处理
         print("\n=== 测试错误处理 ===")
         
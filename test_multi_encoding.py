@@ -1,57 +1,59 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import sys
-import os
-import tempfile
-sys.path.append('.')
-
-from DBCat.sql_editor import SqlEditor
-from PyQt5.QtWidgets import QApplication, QTabWidget
-
-def test_multi_encoding():
-    """测试多编码支持功能"""
-    print("开始测试多编码支持...")
-    
-    # 创建测试应用
-    app = QApplication([])
-    tab_widget = QTabWidget()
-    sql_editor = SqlEditor(tab_widget)
-    
-    # 测试内容
-    test_content = '-- 中文注释测试\nSELECT * FROM table;'
-    
-    # 测试UTF-8编码
-    with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', suffix='.sql', delete=False) as f:
-        f.write(test_content)
-        utf8_file = f.name
-    
-    # 测试GBK编码
-    with tempfile.NamedTemporaryFile(mode='w', encoding='gbk', suffix='.sql', delete=False) as f:
-        f.write(test_content)
-        gbk_file = f.name
-    
-    try:
-        # 测试UTF-8文件读取
-        result_utf8 = sql_editor._safe_read_file(utf8_file)
-        print(f"UTF-8文件读取: {'成功' if result_utf8 else '失败'}")
-        
-        # 测试GBK文件读取
-        result_gbk = sql_editor._safe_read_file(gbk_file)
-        print(f"GBK文件读取: {'成功' if result_gbk else '失败'}")
-        
-        # 验证内容一致性
-        if result_utf8 and result_gbk and result_utf8.strip() == result_gbk.strip():
-            print("✅ 多编码读取内容一致")
-        else:
-            print("❌ 多编码读取内容不一致")
-            
-    finally:
-        # 清理测试文件
-        os.unlink(utf8_file)
-        os.unlink(gbk_file)
-    
-    print("多编码测试完成")
-
-if __name__ == "__main__":
-    test_multi_encoding()
\ No newline at end of file
+from pathlib import Path
+
+import pytest
+
+from DBCat.file_utils import safe_read_file
+
+# 测试内容
+TEST_CONTENT = '-- 中文注释测试\nSELECT * FROM table;'
+
+# 需要支持的编码，gb18030是gbk的超集，utf-8-sig为带BOM的UTF-8
+ENCODINGS = ['utf-8', 'gbk', 'gb18030', 'utf-8-sig']
+
+
+def _write_encoded_files(directory):
+    """在指定目录下按每种编码写入一个测试文件"""
+    files = {}
+    for encoding in ENCODINGS:
+        files[encoding] = Path(directory) / f"t.{encoding}.sql"
+        files[encoding].write_bytes(TEST_CONTENT.encode(encoding))
+    return files
+
+
+@pytest.fixture(scope="module")
+def encoded_sql_files(tmp_path_factory):
+    """整个模块共用一组不同编码的测试文件，由pytest负责清理"""
+    return _write_encoded_files(tmp_path_factory.mktemp("enc"))
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+def test_multi_encoding(encoded_sql_files, encoding):
+    """测试SQL编辑器加载文件时使用的多编码读取"""
+    result = safe_read_file(encoded_sql_files[encoding])
+    assert result is not None, f"{encoding}文件读取失败"
+    assert result.strip() == TEST_CONTENT.strip(), f"{encoding}文件读取内容不一致"
+
+
+def test_gb18030_only_characters(tmp_path):
+    """测试只在GB18030中定义的字符在回退到GBK时也能正确读取"""
+    content = TEST_CONTENT + '\n-- 扩展汉字: 𠀀'
+    gb18030_file = tmp_path / "t.gb18030-ext.sql"
+    gb18030_file.write_bytes(content.encode('gb18030'))
+    assert safe_read_file(gb18030_file) == content
+
+
+def test_crlf_newlines(tmp_path):
+    """测试Windows换行符与文本模式读取一样被统一为\\n"""
+    crlf_file = tmp_path / "t.crlf.sql"
+    crlf_file.write_bytes(TEST_CONTENT.replace('\n', '\r\n').encode('gbk'))
+    assert safe_read_file(crlf_file) == TEST_CONTENT
+
+
+def test_invalid_utf8_after_bom(tmp_path):
+    """测试带BOM但内容不是合法UTF-8的文件继续回退到其它编码"""
+    bom_file = tmp_path / "t.bad-bom.sql"
+    bom_file.write_bytes(b'\xef\xbb\xbfabc\xff\xfe')
+    assert safe_read_file(bom_file) == '\u00ef\u00bb\u00bfabc\u00ff\u00fe'
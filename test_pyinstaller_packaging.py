@@ -5,70 +5,120 @@ import os
 import sys
 import subprocess
 import tempfile
-import time
 from pathlib import Path
 
-def test_pyinstaller_packaging():
-    """测试PyInstaller打包后的功能"""
-    print("\n===== 开始测试PyInstaller打包后的功能 =====\n")
-    
-    # 1. 使用PyInstaller打包应用
-    print("1. 使用PyInstaller打包应用")
+import pyinstaller_utils
+
+# 包含中文的SQL文件内容，用于验证打包后的程序能正确加载非ASCII文件
+CHINESE_SQL = '-- 中文注释测试\nSELECT * FROM 用户表 WHERE 用户名 = "张三";\n'
+
+
+def _write_chinese_sql(home_dir):
+    """在模拟的用户目录下创建包含中文的SQL文件"""
+    sql_dir = Path(home_dir) / ".dbcat" / "sql"
+    sql_dir.mkdir(parents=True, exist_ok=True)
+    (sql_dir / "中文查询.sql").write_text(CHINESE_SQL, encoding="utf-8")
+
+
+def _launch_and_check(exe_path, home_dir=None):
+    """
+    启动打包后的程序，检查其是否在启动后保持运行
+
+    Args:
+        exe_path: 打包后的可执行文件路径
+        home_dir: 可选的用户目录，程序将从该目录加载SQL文件
+
+    Returns:
+        程序没有闪退返回True，否则返回False
+    """
+    exe_path = Path(exe_path)
+    if not exe_path.exists():
+        print(f"✗ 打包后的可执行文件不存在: {exe_path}")
+        return False
+    print(f"✓ 打包后的可执行文件已创建: {exe_path}")
+
+    env = None
+    if home_dir is not None:
+        env = dict(os.environ, HOME=str(home_dir), USERPROFILE=str(home_dir))
+
+    print("注意: 这将启动应用程序，请等待几秒钟...")
     try:
-        # 创建临时目录用于输出
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-            
-            # 执行PyInstaller打包
-            print("执行PyInstaller打包...")
-            result = subprocess.run(
-                ["pyinstaller", "setup.spec", "--distpath", str(temp_path)],
-                check=True, capture_output=True, text=True
-            )
-            print("✓ 应用打包成功")
-            
-            # 检查打包后的可执行文件是否存在
-            exe_path = temp_path / "DBCat.exe"
-            if not exe_path.exists():
-                print(f"✗ 打包后的可执行文件不存在: {exe_path}")
-                return
-            print(f"✓ 打包后的可执行文件已创建: {exe_path}")
-            
-            # 2. 运行打包后的程序
-            print("\n2. 运行打包后的程序")
-            print("注意: 这将启动应用程序，请等待几秒钟...")
-            
-            # 启动应用程序
-            process = subprocess.Popen([str(exe_path)])
-            print(f"✓ 应用程序已启动，进程ID: {process.pid}")
-            
-            # 等待几秒钟
-            time.sleep(5)
-            
-            # 检查程序是否仍在运行
-            if process.poll() is None:
-                print("✓ 程序仍在运行，没有闪退")
-                # 终止程序
-                process.terminate()
-                try:
-                    process.wait(timeout=5)
-                    print("✓ 程序已正常终止")
-                except subprocess.TimeoutExpired:
-                    # 如果无法正常终止，强制终止
-                    process.kill()
-                    print("! 程序已强制终止")
-            else:
-                print(f"✗ 程序已退出，退出码: {process.returncode}")
-                print("程序可能闪退，请检查日志文件")
-    
+        # 启动应用程序
+        process = pyinstaller_utils.launch(exe_path, env)
+        print(f"✓ 应用程序已启动，进程ID: {process.pid}")
+
+        # 等待程序启动，最多等待5秒
+        pyinstaller_utils.wait_for_startup(process, timeout=5)
+
+        # 检查程序是否仍在运行
+        if process.poll() is None:
+            print("✓ 程序仍在运行，没有闪退")
+            # 结束程序及其子进程
+            pyinstaller_utils.kill_process_tree(process)
+            print("✓ 程序已终止")
+            return True
+
+        print(f"✗ 程序已退出，退出码: {process.returncode}")
+        print("程序可能闪退，请检查日志文件")
+        return False
+
     except subprocess.SubprocessError as e:
-        print(f"✗ 打包或运行失败: {e}")
-        if hasattr(e, 'stderr'):
-            print(f"错误输出: {e.stderr}")
-    except Exception as e:
-        print(f"✗ 测试过程中发生错误: {e}")
-    
+        print(f"✗ 运行失败: {e}")
+        return False
+
+
+def test_packaging_smoke(packaged_exe):
+    """测试PyInstaller打包后的程序能正常启动"""
+    print("\n===== 开始测试PyInstaller打包后的功能 =====\n")
+    assert _launch_and_check(packaged_exe)
     print("\n===== PyInstaller打包测试完成 =====")
 
+
+def test_packaging_encoding(packaged_exe, tmp_path):
+    """测试PyInstaller打包后的程序能加载包含中文的SQL文件"""
+    print("\n===== 开始测试打包后程序加载中文SQL文件 =====\n")
+    _write_chinese_sql(tmp_path)
+    assert _launch_and_check(packaged_exe, home_dir=tmp_path)
+    print("\n===== 中文SQL文件加载测试完成 =====")
+
+
+def _make_project(project_dir):
+    """按 setup.spec 的打包内容创建一个最小的项目目录"""
+    (project_dir / "DBCat").mkdir()
+    (project_dir / "image").mkdir()
+    (project_dir / "setup.spec").write_text("# spec", encoding="utf-8")
+    (project_dir / "main.py").write_text("print('main')", encoding="utf-8")
+    (project_dir / "DBCat" / "dbCat.py").write_text("print('dbcat')", encoding="utf-8")
+    (project_dir / "image" / "run.png").write_bytes(b"png")
+    (project_dir / "logo.ico").write_bytes(b"ico")
+    (project_dir / "version.txt").write_text("1.0", encoding="utf-8")
+
+
+def test_source_hash_covers_bundled_files(tmp_path, monkeypatch):
+    """测试打包进程序的资源文件变化后缓存失效"""
+    _make_project(tmp_path)
+    monkeypatch.setattr(pyinstaller_utils, "PROJECT_DIR", tmp_path)
+
+    for name in ("image/run.png", "logo.ico", "version.txt"):
+        before = pyinstaller_utils.source_hash()
+        (tmp_path / name).write_bytes(b"changed " + name.encode("utf-8"))
+        assert pyinstaller_utils.source_hash() != before, f"{name}变化后哈希未变化"
+
+
+def test_prune_cache_keeps_latest_build(tmp_path, monkeypatch):
+    """测试打包成功后只保留最新的打包结果和PyInstaller工作目录"""
+    monkeypatch.setattr(pyinstaller_utils, "CACHE_DIR", tmp_path)
+    for name in ("old", "latest", "build"):
+        (tmp_path / name).mkdir()
+    (tmp_path / "pyinstaller.log").write_text("log", encoding="utf-8")
+
+    pyinstaller_utils._prune_cache(tmp_path / "latest")
+
+    assert sorted(entry.name for entry in tmp_path.iterdir()) == ["build", "latest", "pyinstaller.log"]
+
+
 if __name__ == "__main__":
-    test_pyinstaller_packaging()
\ No newline at end of file
+    exe = pyinstaller_utils.build_exe()
+    test_packaging_smoke(exe)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        test_packaging_encoding(exe, Path(temp_dir))
@@ -1,12 +1,10 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import sys
 import os
 import json
 import tempfile
 from pathlib import Path
-sys.path.append('.')
 
 from DBCat import resource
 
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import re
+from decimal import Decimal
+
+import pytest
+from PyQt5.QtCore import Qt, QItemSelectionModel
+from PyQt5.QtWidgets import QPlainTextEdit
+
+from DBCat.component import sqlTableView
+from DBCat.dboperator import mysql_operator
+from DBCat.sql_control_edit import MyTableModel, SqlControlEdit
+
+
+def _display_row(model, row=0):
+    return [model.data(model.index(row, col)) for col in range(model.columnCount())]
+
+
+def test_falsy_values_are_displayed(qapp):
+    """测试0、False、Decimal(0)等假值正常显示，而不是显示为空"""
+    model = MyTableModel([(0, False, Decimal(0), 0.0)], ['a', 'b', 'c', 'd'])
+    assert _display_row(model) == ['0', 'False', '0', '0.0']
+
+
+@pytest.mark.parametrize("value", [None, '', b''])
+def test_empty_values_are_blank(qapp, value):
+    """测试NULL、空字符串和空字节串显示为空"""
+    model = MyTableModel([(value,)], ['a'])
+    assert _display_row(model) == ['']
+
+
+def _column(model, col=0):
+    return [model.data(model.index(row, col)) for row in range(model.rowCount())]
+
+
+@pytest.mark.parametrize("values, ascending", [
+    # 数值列按数值排序，NULL排在最前
+    ([3, None, 10, 1], ['', '1', '3', '10']),
+    # 数值字符串同样按数值排序
+    (['10', '9', '100'], ['9', '10', '100']),
+    # 文本列按显示文本排序
+    (['b', None, 'a', 'C'], ['', 'C', 'a', 'b']),
+    # 超过2^53的相邻大整数按精确值排序
+    ([1234567890123456790, 1234567890123456789], ['1234567890123456789', '1234567890123456790']),
+    (['1234567890123456790', '1234567890123456789'], ['1234567890123456789', '1234567890123456790']),
+    ([Decimal('9007199254740993.5'), Decimal('9007199254740993.25')],
+     ['9007199254740993.25', '9007199254740993.5']),
+    # NaN不参与数值排序，整列按显示文本排序
+    (['NaN', '2', '10'], ['10', '2', 'NaN']),
+    # 数值与文本混合的列整体按显示文本排序
+    ([10, 'abc', 2, None], ['', '10', '2', 'abc']),
+])
+def test_sort_order(qapp, values, ascending):
+    """测试升序、降序排序结果"""
+    model = MyTableModel([(value,) for value in values], ['a'])
+    model.sort(0, Qt.AscendingOrder)
+    assert _column(model) == ascending
+    model.sort(0, Qt.DescendingOrder)
+    assert _column(model) == ascending[::-1]
+
+
+def test_sort_maps_item_data_through_row_index(qapp):
+    """测试排序后按视图行号取值时映射到对应的数据行"""
+    model = MyTableModel([(2, 'two'), (3, 'three'), (1, 'one')], ['id', 'name'])
+    model.sort(0, Qt.DescendingOrder)
+    assert [model.item_data(row, 1) for row in range(3)] == ['three', 'two', 'one']
+    model.sort(1, Qt.AscendingOrder)
+    assert [model.item_data(row, 0) for row in range(3)] == ['1', '3', '2']
+
+
+def test_sort_ignores_invalid_column(qapp):
+    """测试无排序列时保持原始顺序"""
+    model = MyTableModel([(2,), (1,)], ['a'])
+    model.sort(-1, Qt.AscendingOrder)
+    assert _column(model) == ['2', '1']
+
+
+def test_sort_keeps_selection_on_same_record(qapp):
+    """测试重新排序后选中项仍指向原来的数据行"""
+    model = MyTableModel([(2, 'two'), (3, 'three'), (1, 'one')], ['id', 'name'])
+    selection = QItemSelectionModel(model)
+    selection.select(model.index(0, 1), QItemSelectionModel.Select)
+
+    for column, order in [(0, Qt.AscendingOrder), (0, Qt.DescendingOrder), (1, Qt.AscendingOrder)]:
+        model.sort(column, order)
+        selected = selection.selectedIndexes()
+        assert len(selected) == 1
+        assert selected[0].column() == 1
+        assert model.data(selected[0]) == 'two'
+
+
+def test_append_records_removes_load_more_row(qapp):
+    """测试追加数据插入在“加载更多”行之前，最后一页后移除该行"""
+    model = MyTableModel([(1,), (2,)], ['id'], has_more=True)
+    assert model.rowCount() == 3
+    assert model.is_load_more_row(2)
+    assert model.data(model.index(2, 0)) == MyTableModel.LOAD_MORE_TEXT
+
+    model.append_records([(3,), (4,)], True)
+    assert model.record_count() == 4
+    assert model.rowCount() == 5
+    assert not model.is_load_more_row(2)
+    assert model.is_load_more_row(4)
+
+    model.append_records([(5,)], False)
+    assert model.rowCount() == model.record_count() == 5
+    assert not model.is_load_more_row(5)
+    assert _column(model) == ['1', '2', '3', '4', '5']
+
+
+def test_append_records_after_sort(qapp):
+    """测试排序后追加的数据同样参与排序映射"""
+    model = MyTableModel([(2,), (1,)], ['id'], has_more=True)
+    model.sort(0, Qt.AscendingOrder)
+    model.append_records([(0,)], False)
+    assert _column(model) == ['1', '2', '0']
+    model.sort(0, Qt.AscendingOrder)
+    assert _column(model) == ['0', '1', '2']
+
+
+class FakeMysqlOperator:
+    """按SQL返回内存中表数据的 do_exec_statement 替身，不需要数据库"""
+
+    def __init__(self, rows, primary_key):
+        self.rows = rows
+        self.primary_key = primary_key
+        self.statements = []
+
+    def do_exec_statement(self, host_id, database, sql):
+        self.statements.append(sql)
+        if sql.startswith('SHOW KEYS'):
+            return ([('t', 0, 'PRIMARY', seq, name) for seq, name in enumerate(self.primary_key, 1)],
+                    ['Table', 'Non_unique', 'Key_name', 'Seq_in_index', 'Column_name'])
+        limit = int(re.search(r'LIMIT (\d+)', sql).group(1))
+        offset = re.search(r'OFFSET (\d+)', sql)
+        offset = int(offset.group(1)) if offset else 0
+        return self.rows[offset:offset + limit], ['id', 'name']
+
+
+@pytest.fixture
+def control_edit(tab_widget, monkeypatch):
+    """创建带消息页和结果页的SqlControlEdit，数据库访问由测试替换"""
+    message = QPlainTextEdit()
+    tab_widget.addTab(message, 'message')
+    tab_widget.addTab(sqlTableView.SqlTableView(), 'result')
+    edit = SqlControlEdit(tab_widget)
+    edit.init_message(message)
+    monkeypatch.setattr(SqlControlEdit, 'PAGE_SIZE', 3)
+    return edit
+
+
+def _use_fake_operator(monkeypatch, operator):
+    monkeypatch.setattr(mysql_operator.MysqlOperator, 'do_exec_statement',
+                        lambda self, *args: operator.do_exec_statement(*args))
+
+
+def test_open_table_pages_by_primary_key(control_edit, tab_widget, monkeypatch):
+    """测试打开表时按主键排序分页，点击“加载更多”行依次加载后续数据"""
+    rows = [(i, f'name{i}') for i in range(7)]
+    operator = FakeMysqlOperator(rows, ['id', 'name'])
+    _use_fake_operator(monkeypatch, operator)
+
+    control_edit.open_table(1, 'db', 't')
+    view = tab_widget.currentWidget()
+    model = view.model()
+    assert 'ORDER BY `id`, `name` LIMIT 3 OFFSET 0' in operator.statements[-1]
+    assert model.rowCount() == 4
+    assert view.columnSpan(3, 0) == 2
+
+    # 点击普通数据行不加载
+    view.clicked.emit(model.index(0, 0))
+    assert model.record_count() == 3
+
+    view.clicked.emit(model.index(3, 0))
+    assert operator.statements[-1].endswith('LIMIT 3 OFFSET 3')
+    assert model.rowCount() == 7
+    assert model.is_load_more_row(6)
+    assert view.columnSpan(6, 0) == 2
+    assert view.columnSpan(3, 0) == 1
+
+    view.clicked.emit(model.index(6, 0))
+    assert model.rowCount() == model.record_count() == 7
+    assert view.columnSpan(6, 0) == 1
+    # 每一行都只加载一次，没有重复或遗漏
+    view.sortByColumn(0, Qt.AscendingOrder)
+    assert _column(model) == [str(i) for i in range(7)]
+
+
+def test_open_table_without_primary_key(control_edit, tab_widget, monkeypatch):
+    """测试没有主键的表只查询一次，超过上限时提示"""
+    monkeypatch.setattr(SqlControlEdit, 'NO_KEY_MAX_ROWS', 5)
+    operator = FakeMysqlOperator([(i, f'name{i}') for i in range(7)], [])
+    _use_fake_operator(monkeypatch, operator)
+
+    control_edit.open_table(1, 'db', 't')
+    model = tab_widget.currentWidget().model()
+    assert operator.statements[-1] == 'SELECT * FROM t LIMIT 5'
+    assert model.rowCount() == model.record_count() == 5
+    assert not model.is_load_more_row(5)
+    assert '没有主键' in control_edit.sqlMessage.toPlainText()